@@ -113,5 +113,5 @@ __version__ = '0.2.3'
 
 from . import kml
 from .classes import StDbElement
-from .io import write_db, load_db, tocsv, fromcsv
+from .io import write_db, load_db, load_networks, tocsv, fromcsv, cached_utc
 from .gui import EditMsgBox
@@ -73,6 +73,8 @@ class StDbElement(dict):
         Initialization for a Database Element
 
         """
+        # Attributes are stored as the dict items themselves, so there is
+        # no separate per-instance __dict__ for __slots__ to remove
         self.__dict__ = self
         self.station = station
         self.network = network
@@ -23,11 +23,16 @@
 """
 Tools used for loading and writing a station database to and from disk. 
 These functions are used in most scripts bundled with this package. 
+Pickle files are read and written with the standard :mod:`pickle` module,
+which on Python 3 always uses the C accelerator (``_pickle``).
 
 """
 
+import re
+import pickle
+import os
+import os.path as osp
 from stdb import StDbElement
-import pickle as pickle
 from obspy import UTCDateTime
 
 def load_db(fname, binp=True, keys=None ):
@@ -39,7 +44,8 @@ def load_db(fname, binp=True, keys=None ):
     fname : str
         File name. Assume csv format when ending in ".csv"
     binp : bool
-        Whether or not to use binary input (only for pickle files)
+        Kept for backwards compatibility. Pickle files are always opened in
+        binary mode, and the pickle protocol is detected on load
     keys : List
         Default None
         If a list, then load database and select only keys that match those in this
@@ -52,38 +58,34 @@ def load_db(fname, binp=True, keys=None ):
 
     """
 
-    if binp:
-        rflag = 'rb'
-    else:
-        rflag = 'r'
-
     if fname.endswith('.csv'):
         stdb = {}
+        dt_cache = {}
         with open(fname, 'r') as f:
             for line in f:
-                k, v = fromcsv(line)
+                k, v = fromcsv(line, dt_cache=dt_cache)
                 stdb.update({k: v})
     else:
-        stdb = pickle.load(open(fname, rflag))
+        with open(fname, 'rb', buffering=1<<20) as f:
+            stdb = pickle.load(f)
 
-    allkeys=stdb.keys()
-    sorted(allkeys)
+    allkeys = sorted(stdb)
 
     #-- parse dictionary for specific keys if provided
     if keys is not None:
         # Extract key subset
         if len(keys) > 0:
-           stkeys = []
            negkeys=[s[1:] for s in keys if '~' in s]
            getkeys=[s for s in keys if '~' not in s]
            if len(getkeys)>0:
-               for skey in getkeys:
-                   stkeys.extend([s for s in allkeys if skey in s])
+               # Single pass over all keys with one combined pattern
+               pat = re.compile('|'.join(re.escape(f) for f in getkeys))
+               stkeys = [s for s in allkeys if pat.search(s)]
            else:
                 stkeys=allkeys
            if len(negkeys)>0:
-                for skey in negkeys:
-                    stkeys=[s for s in stkeys if skey not in s] 
+                pat = re.compile('|'.join(re.escape(f) for f in negkeys))
+                stkeys = [s for s in stkeys if not pat.search(s)]
         else:
             stkeys = allkeys    
 
@@ -94,7 +96,8 @@ def load_db(fname, binp=True, keys=None ):
         return stdb, stkeys
 
 
-def write_db(fname, stdb, binp=True):
+def write_db(fname, stdb, binp=True, protocol=pickle.HIGHEST_PROTOCOL,
+             netfile=False):
     """
     Submodule to write the station database to file
 
@@ -105,16 +108,67 @@ def write_db(fname, stdb, binp=True):
     stdb : :class:`~stdb.classes.StDbElement`
         Instance of :class:`~stdb.classes.StDbElement`
     binp : bool
-        Whether or not to use binary output
+        Whether or not to use binary output. If False, the ascii pickle
+        protocol (0) is used regardless of ``protocol``
+    protocol : int
+        Pickle protocol used to serialize the database
+        (Default ``pickle.HIGHEST_PROTOCOL``)
+    netfile : bool
+        Whether or not to also write the sorted list of networks to
+        ``fname + '.nets'``, to be read by :func:`~stdb.io.load_networks`
 
     """
 
-    if binp:
-        wflag = 'wb'
-    else:
-        wflag = 'w'
+    if not binp:
+        protocol = 0
+
+    # Serialize before opening the file, so that an error cannot leave
+    # behind a truncated database
+    data = pickle.dumps(stdb, protocol=protocol)
+    with open(fname, 'wb') as f:
+        f.write(data)
+
+    if netfile:
+        # Tag the network list with the size and modification time of the
+        # database, so that it is ignored once the database changes
+        st = os.stat(fname)
+        nets = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns,
+                'networks': sorted(set(stdb[key].network for key in stdb))}
+        data = pickle.dumps(nets, protocol=protocol)
+        with open(fname + '.nets', 'wb') as f:
+            f.write(data)
+
+
+def load_networks(fname):
+    """
+    Submodule to read the list of networks saved alongside a station
+    database by :func:`~stdb.io.write_db`, without loading the database
+
+    Parameters
+    ----------
+    fname : str
+        File name of the station database
+
+    Returns
+    -------
+    nets : List
+        Sorted list of networks, or None if there is no network file or it
+        was not written for the current version of the database
+
+    """
 
-    pickle.dump(stdb, open(fname, wflag))
+    nfname = fname + '.nets'
+    if not osp.exists(nfname):
+        return None
+
+    with open(nfname, 'rb') as f:
+        nets = pickle.load(f)
+
+    st = os.stat(fname)
+    if nets['size'] != st.st_size or nets['mtime_ns'] != st.st_mtime_ns:
+        return None
+
+    return nets['networks']
 
 
 def tocsv(stel):
@@ -145,7 +199,35 @@ def tocsv(stel):
     return csvstr
 
 
-def fromcsv(line="", lkey=False):
+def cached_utc(s, cache, parse=UTCDateTime):
+    """
+    Subroutine to convert a date string to UTCDateTime, parsing each unique
+    string only once
+
+    Parameters
+    ----------
+    s : str
+        Date string
+    cache : dict
+        Dictionary of already parsed dates, keyed by date string. Share it
+        across calls on lines of the same file
+    parse : callable
+        Default UTCDateTime
+        Function used to parse ``s`` when it is not in ``cache``
+
+    Returns
+    -------
+    dt : :class:`~obspy.core.utcdatetime.UTCDateTime`
+        Parsed date
+
+    """
+    dt = cache.get(s)
+    if dt is None:
+        dt = cache[s] = parse(s)
+    return dt
+
+
+def fromcsv(line="", lkey=False, dt_cache=None):
     """
     Subroutine to convert a csv format string into an StDbElement
 
@@ -155,6 +237,10 @@ def fromcsv(line="", lkey=False):
         Line to read as csv
     lkey : bool
         Parameter controlling the length of the key (with or without CHANNEL info)
+    dt_cache : dict
+        Default None
+        If a dict, parsed start and end dates are stored in and reused from it,
+        so that it can be shared across calls on lines of the same file
 
     Returns
     -------
@@ -166,6 +252,9 @@ def fromcsv(line="", lkey=False):
     """
     if len(line.split(',')) > 6:
 
+        if dt_cache is None:
+            dt_cache = {}
+
         line = line.split(',')
         
         # Networks
@@ -212,7 +301,8 @@ def fromcsv(line="", lkey=False):
         # Create Elemennt
         entry = StDbElement(network=net, altnet=altnet, station=stn, channel=chn, \
             location=loc, latitude=lat, longitude=lon, elevation=elev, polarity=pol, \
-            azcorr=azcor, startdate=UTCDateTime(stdt), enddate=UTCDateTime(eddt), \
+            azcorr=azcor, startdate=cached_utc(stdt, dt_cache), \
+            enddate=cached_utc(eddt, dt_cache), \
             restricted_status=status)
         
         return key, entry
@@ -42,88 +42,148 @@ Usage
 .. code-block:: none
 
     gen_stdb -h
-    Usage: gen_stdb [options] <station list>
+    usage: gen_stdb [options] <station list>
 
     Script to generate a pickled station database file.
 
-    Options:
-      -h, --help       show this help message and exit
-      -L, --long-keys  Specify Key format. Default is Net.Stn. Long keys are
-                       Net.Stn.Chn
-      -a, --ascii      Specify to write ascii Pickle files instead of binary.
-                       Ascii are larger file size, but more likely to be system
-                       independent.
+    positional arguments:
+      infile               Input station list
+
+    options:
+      -h, --help           show this help message and exit
+      -L, --long-keys      Specify Key format. Default is Net.Stn. Long keys are
+                           Net.Stn.Chn
+      -a, --ascii          Specify to write ascii Pickle files instead of binary.
+                           Ascii are larger file size, but more likely to be
+                           system independent. Equivalent to --protocol=0.
+      --protocol PROTOCOL  Specify the pickle protocol used to write the database,
+                           from 0 to pickle.HIGHEST_PROTOCOL (-1 for the highest).
+                           [Default pickle.HIGHEST_PROTOCOL]
+      --net-index          Also save the list of networks to <database>.pkl.nets,
+                           so that ls_stdb -N does not need to load the database.
 
     Input File Type 1 (chS csv):
-    NET[:NET2:...],STA,LOC[:LOC2:...],CHN,YYYY-MM-DD,HH:MM:SS.SSS,YYYY-MM-
-    DD,HH:MM:SS.SSS,lat,lon,elev,pol,azcor,status
+    NET[:NET2:...],STA,LOC[:LOC2:...],CHN,YYYY-MM-DD,HH:MM:SS.SSS,
+    YYYY-MM-DD,HH:MM:SS.SSS,lat,lon,elev,pol,azcor,status
+
     Input File Type 2 (IPO SPC):
     NET STA CHAN lat lon elev YYYY-MM-DD YYYY-MM-DD
+
     Output File Types:
-    Each element corresponding to each dictionary key is saved as StDb.StbBElement
-    class.
+    Each element corresponding to each dictionary key is saved as
+    StDb.StbBElement class. With --net-index, the sorted list of networks is
+    also saved to <database>.pkl.nets, which ls_stdb -N reads instead of the
+    database for as long as the size and modification time of the .pkl file
+    match those recorded in it.
 """
 
 
-from sys import exit
+from sys import exit, intern
 import os.path as osp
+import pickle
+from datetime import datetime
 from obspy.core import UTCDateTime
-from stdb import write_db
+from stdb import write_db, cached_utc
 from stdb import StDbElement
-from optparse import OptionParser
+from argparse import ArgumentParser, RawDescriptionHelpFormatter
+
 
+def fast_utc(s):
+    """
+    Convert a date string to UTCDateTime, trying the YYYY-MM-DD format of
+    the station list date fields with strptime before falling back on the
+    generic UTCDateTime parser.
 
-class MyParser(OptionParser):
-    def format_epliog(self, formatter):
-        return self.epilog
+    """
+    try:
+        return UTCDateTime(datetime.strptime(s, "%Y-%m-%d"))
+    except ValueError:
+        return UTCDateTime(s)
 
 def main(args=None):
 
     # Get options
-    parser = MyParser(usage="Usage: %prog [options] <station list>",
+    parser = ArgumentParser(usage="%(prog)s [options] <station list>",
                  description="Script to generate a pickled station database file.",
-                 epilog="""Input File Type 1 (chS csv):                                                 
-NET[:NET2:...],STA,LOC[:LOC2:...],CHN,YYYY-MM-DD,HH:MM:SS.SSS,YYYY-MM-DD,HH:MM:SS.SSS,lat,lon,elev,pol,azcor,status
-                                                                                                             
-Input File Type 2 (IPO SPC):                                                                            
-NET STA CHAN lat lon elev YYYY-MM-DD YYYY-MM-DD                                                     
-                                                                                                    
-                                                                                                                                        
-Output File Types:                                                            
-Each element corresponding to each dictionary key is saved as StDb.StbBElement class.                                         
-                                                                                                                                                                                                                                                    
+                 formatter_class=RawDescriptionHelpFormatter,
+                 epilog="""Input File Type 1 (chS csv):
+NET[:NET2:...],STA,LOC[:LOC2:...],CHN,YYYY-MM-DD,HH:MM:SS.SSS,
+YYYY-MM-DD,HH:MM:SS.SSS,lat,lon,elev,pol,azcor,status
+
+Input File Type 2 (IPO SPC):
+NET STA CHAN lat lon elev YYYY-MM-DD YYYY-MM-DD
+
+Output File Types:
+Each element corresponding to each dictionary key is saved as
+StDb.StbBElement class. With --net-index, the sorted list of networks is
+also saved to <database>.pkl.nets, which ls_stdb -N reads instead of the
+database for as long as the size and modification time of the .pkl file
+match those recorded in it.
 """)
-    parser.add_option("-L", "--long-keys", action="store_true", dest="lkey", default=False, \
+    parser.add_argument("infile", help="Input station list")
+    parser.add_argument("-L", "--long-keys", action="store_true", dest="lkey", default=False, \
         help="Specify Key format. Default is Net.Stn. Long keys are Net.Stn.Chn")
-    parser.add_option("-a", "--ascii", action="store_false", dest="use_binary", default=True, \
+    parser.add_argument("-a", "--ascii", action="store_false", dest="use_binary", default=True, \
         help="Specify to write ascii Pickle files instead of binary. Ascii are larger file size, " \
-        "but more likely to be system independent.")
-    (opts, args) = parser.parse_args()
+        "but more likely to be system independent. Equivalent to --protocol=0.")
+    parser.add_argument("--protocol", action="store", type=int, dest="protocol", \
+        default=pickle.HIGHEST_PROTOCOL, metavar="PROTOCOL", \
+        choices=range(-1, pickle.HIGHEST_PROTOCOL + 1), help="Specify the pickle " \
+        "protocol used to write the database, from 0 to pickle.HIGHEST_PROTOCOL " \
+        "(-1 for the highest). [Default pickle.HIGHEST_PROTOCOL]")
+    parser.add_argument("--net-index", action="store_true", dest="netfile", default=False, \
+        help="Also save the list of networks to <database>.pkl.nets, so that ls_stdb -N " \
+        "does not need to load the database.")
+    opts = parser.parse_args(args)
+
+    if not opts.use_binary:
+        opts.protocol = 0
     
-    if not osp.exists(args[0]):
-        parser.error("Input File " + args[0] + " does not exist")
+    if not osp.exists(opts.infile):
+        parser.error("Input File " + opts.infile + " does not exist")
 
     # Check Extension    
-    ext = osp.splitext(args[0])[1]
+    ext = osp.splitext(opts.infile)[1]
     if ext != ".pkl":
 
         # Station List...Pickle it.
-        print ("Parse Station List " + args[0])
+        print ("Parse Station List " + opts.infile)
 
-        ofn = args[0]
+        ofn = opts.infile
         if ofn.find(".csv"):
             if (len(ofn)-4) == ofn.find(".csv"):
                 ofn = osp.splitext(ofn)[0]
         pklfile = ofn + ".pkl"
         
-        fin = open(args[0],'r')
+        # Station lists are small, so read them in a single buffered call
+        with open(opts.infile, 'r', buffering=1<<20) as fin:
+            lines = fin.read().splitlines()
         stations = {}
-        for line in fin:
+
+        # Station lists repeat the same dates across many rows, so only
+        # parse each unique date string once
+        dt_cache = {}
+
+        # Key format does not change between lines
+        if opts.lkey:
+            keyfmt = "{0:s}.{1:s}.{2:2s}".format
+        else:
+            keyfmt = "{0:s}.{1:s}".format
+
+        for line in lines:
             line = line.strip()
             if len(line) == 0 or line[0] == "#":
                 continue
-            if len(line.split(',')) > 6:
-                line = line.split(',')
+
+            # Split once, and only try whitespace if not a csv line
+            csv_parts = line.split(',')
+            if len(csv_parts) <= 6:
+                ws_parts = line.split()
+                if len(ws_parts) <= 6:
+                    ws_parts = line.split('\t')
+
+            if len(csv_parts) > 6:
+                line = csv_parts
 
                 # Networks
                 nets = line[0].split(':')
@@ -139,10 +199,10 @@ Each element corresponding to each dictionary key is saved as StDb.StbBElement c
                 # Required Location Parameters
                 loc = line[2].split(':')
                 # Required Channel Parmaeters
-                chn = line[3][0:2]
+                chn = line[3]
                 # Required Timing Parameters
-                stdt = UTCDateTime(line[4]); sttm = line[5]
-                eddt = UTCDateTime(line[6]); edtm = line[7]
+                stdt = cached_utc(line[4], dt_cache, parse=fast_utc); sttm = line[5]
+                eddt = cached_utc(line[6], dt_cache, parse=fast_utc); edtm = line[7]
                 # Required Position Parameters
                 lat = float(line[8]); lon = float(line[9])
                 
@@ -157,22 +217,22 @@ Each element corresponding to each dictionary key is saved as StDb.StbBElement c
                 if len(line) == 14:
                     status = line[13]
                     
-            elif len(line.split()) > 6 or len(line.split('\t')) > 6:
-                if len(line.split()) > 6:
-                    line = line.split()
-                else:
-                    line = line.split('\t')
-                net = line[0]; stn = line[1]; chn = line[2][0:2]
-                stdt = UTCDateTime(line[6]); eddt = UTCDateTime(line[7])
+            elif len(ws_parts) > 6:
+                line = ws_parts
+                net = line[0]; stn = line[1]; chn = line[2]
+                stdt = cached_utc(line[6], dt_cache, parse=fast_utc)
+                eddt = cached_utc(line[7], dt_cache, parse=fast_utc)
                 lat = float(line[3]); lon = float(line[4])
                 elev = float(line[5])
                 altnet = []; status = ""; azcor = 0.; pol = 0.; loc = ""
 
+            # Strip and cut the codes once, and intern them since they repeat
+            # across rows, so that the pickle stores each one once
+            net = intern(net.strip()); stn = intern(stn.strip())
+            chn = intern(chn.strip()[0:2])
+
             # Now Add lines to station Dictionary
-            if opts.lkey:
-                key = "{0:s}.{1:s}.{2:2s}".format(net.strip(), stn.strip(), chn.strip())
-            else:
-                key = "{0:s}.{1:s}".format(net.strip(), stn.strip())
+            key = keyfmt(net, stn, chn)
             if key not in stations:
                 stations[key] = StDbElement(network=net, station=stn, channel=chn, \
                     location=loc, latitude=lat, longitude=lon, elevation=elev, polarity=pol, \
@@ -187,7 +247,7 @@ Each element corresponding to each dictionary key is saved as StDb.StbBElement c
 
         # Save and Pickle the station database
         print ("  Pickling {0:s}".format(pklfile))
-        write_db(fname=pklfile, stdb=stations, binp=opts.use_binary)
+        write_db(fname=pklfile, stdb=stations, protocol=opts.protocol, netfile=opts.netfile)
     else:
         print ("Error: Must supply a station list, not a Pickle File")
         exit()
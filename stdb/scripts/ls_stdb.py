@@ -44,7 +44,9 @@ Usage
     Options:
       -h, --help      show this help message and exit
       -N, --networks  Use flag to retrieve only the list of networks in the
-                      database
+                      database. Without --keys, the network index written by
+                      gen_stdb --net-index is used instead, if it matches the
+                      database.
       --keys=KEYS     Specify a comma separated list of keys to return. These can
                       be fragments of a key to include all keys matching any
                       fragment.
@@ -56,7 +58,7 @@ Usage
 
 import sys
 import os.path as osp
-from stdb import load_db
+from stdb import load_db, load_networks
 
 def get_options():
     from optparse import OptionParser
@@ -64,7 +66,9 @@ def get_options():
     parser=OptionParser(usage="Usage: %prog [options] <station pickle file>", \
         description="Helper program to examine the contents of a station pickle file")
     parser.add_option("-N", "--networks", action="store_true", dest="networks", default=False, \
-        help="Use flag to retrieve only the list of networks in the database")
+        help="Use flag to retrieve only the list of networks in the database. Without " \
+        "--keys, the network index written by gen_stdb --net-index is used instead, if " \
+        "it matches the database.")
     parser.add_option("--keys", action="store", type=str, dest="keys", default="", \
         help="Specify a comma separated list of keys to return. These can be fragments " \
         "of a key to include all keys matching any fragment.")
@@ -112,44 +116,39 @@ def main(args=None):
     for inpickle in inpickles:
 
         # Pickle Already Created...
-        print ("Listing Station Pickle: {0:s}".format(inpickle))
+        print (f"Listing Station Pickle: {inpickle}")
+
+        # Networks only? Use the saved network list if there is no key subset
+        if opts.networks and len(opts.keys) == 0:
+            nets = load_networks(inpickle)
+            if nets is not None:
+                print ("Networks: ")
+                for net in nets:
+                    print (net)
+                continue
+
         db, stkeys = load_db(inpickle, binp=opts.use_binary, keys=opts.keys)
         
-        # Networks only?
         if opts.networks:
-            nets = []
-        
-        # # construct station key loop
-        # allkeys = db.keys()
-        # sorted(allkeys)
-     
-        # # Extract key subset
-        # if len(opts.keys) > 0:
-        #     stkeys = []
-        #     for skey in opts.keys:
-        #         stkeys.extend([s for s in allkeys if skey in s] )
-        # else:
-        #     stkeys = db.keys()
-        #     sorted(stkeys)
-        
+            nets = set()
+            for key in stkeys:
+                nets.add(db[key].network)
+            print ("Networks: ")
+            for net in sorted(nets):
+                print (net)
+            continue
+
+        # Build the listing and write it out in one call
+        out = []
         ikey = 0
         for key in stkeys:
-            #print(key)
             ikey += 1
-            if opts.networks:
-                nets.append(db[key].network)
-                continue
-            print ("--------------------------------------------------------------------------")
-            print ("{0:.0f}) {1:s}".format(ikey, key))
-            print (db[key](5))
-            print ("")
-        
-        if opts.networks:
-            nets = list(set(nets))
-            nets.sort()
-            print ("Networks: ")
-            for net in nets:
-                print (net)
+            out.append("--------------------------------------------------------------------------")
+            out.append(f"{ikey:.0f}) {key}")
+            out.append(db[key](5))
+            out.append("")
+        if len(out) > 0:
+            sys.stdout.write("\n".join(out) + "\n")
 
 if __name__=='__main__':
 